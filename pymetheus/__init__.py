@@ -1,9 +1,23 @@
+import asyncio
 import sys
 
 from pymetheus.ui.app import PymetheusApp
 
-app = PymetheusApp()
 
-if __name__ == "__main__":
+def main() -> None:
+    try:
+        import uvloop
+    except ImportError:
+        pass
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+    # Built here so that importing the package doesn't parse the arguments
+    # or open the library
+    app = PymetheusApp()
     app.run()
     sys.exit(app.return_code or 0)
+
+
+if __name__ == "__main__":
+    main()
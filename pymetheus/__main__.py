@@ -0,0 +1,3 @@
+from pymetheus import main
+
+main()
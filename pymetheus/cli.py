@@ -0,0 +1,18 @@
+import argparse
+from functools import cache
+from pathlib import Path
+
+
+@cache
+def get_parsed_args() -> argparse.Namespace:
+    """Parse the command line arguments, only once per process."""
+    main_argparser = argparse.ArgumentParser(prog="pymetheus")
+
+    main_argparser.add_argument(
+        "-L", "--library",
+        help="Path to the library to use",
+        type=Path,
+        metavar="LIBRARY_PATH",
+    )
+
+    return main_argparser.parse_args()
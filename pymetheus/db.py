@@ -1,34 +1,199 @@
 import argparse
+import asyncio
 import os
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
 from pathlib import Path
+from typing import Callable, TypeVar
 
+from .json_backend import loads
 from .paths import (
     search_library_file_with_precedence,
     get_app_data_dir,
     get_default_library_path
 )
 
+T = TypeVar("T")
+
+
+def get_ddl_path(name: str, /) -> Path:
+    current_path = Path(__file__).resolve()
+    return current_path.parent / "ddl" / f"{name}.sql"
+
+
+# Reads that would block the UI run on this thread, one after another,
+# through a connection of their own from connect_for_reading
+_query_executor = ThreadPoolExecutor(
+    max_workers=1,
+    thread_name_prefix="pymetheus-db",
+)
+
+
+def connect_to_library(path: Path, /) -> sqlite3.Connection:
+    connection = sqlite3.connect(path, cached_statements=256)
+    # Only one writer ever uses the library, so the WAL does not need to be
+    # synced on every commit, only at checkpoints.
+    connection.execute("pragma journal_mode = wal")
+    connection.execute("pragma synchronous = normal")
+    _tune_connection(connection)
+    _create_functions(connection)
+    return connection
+
+
+def connect_for_reading(path: Path, /) -> sqlite3.Connection:
+    """Open a connection for the reads run on the database thread.
+
+    With the WAL journal, it only ever sees committed changes, and it can
+    read while the UI thread writes through its own connection.
+    """
+    # Opened here, but only used on the thread of _query_executor
+    connection = sqlite3.connect(
+        path,
+        check_same_thread=False,
+        cached_statements=256,
+    )
+    connection.execute("pragma query_only = on")
+    _tune_connection(connection)
+    _create_functions(connection)
+    return connection
+
+
+def _tune_connection(connection: sqlite3.Connection, /) -> None:
+    # Sorting and temporary b-trees of search queries stay off the disk
+    connection.execute("pragma temp_store = memory")
+    # Reads are served from a 256 MiB map of the file and a 20 MB page cache
+    connection.execute("pragma mmap_size = 268435456")
+    connection.execute("pragma cache_size = -20000")
+
+
+def _create_functions(connection: sqlite3.Connection, /) -> None:
+    # Searches scan the items with this where item_fts can't be used. Only
+    # queries call it, the schema must stay usable by other SQLite clients.
+    connection.create_function(
+        "item_search_text", 2, get_item_search_text, deterministic=True
+    )
+
+
+def get_item_search_text(field_data: str, creators: str, /) -> str:
+    """Get the casefolded text of an item's fields and names.
+
+    Every word of a query that Item.search matches the item with is a part
+    of this text.
+    """
+    values = list(loads(field_data).values())
+    for name_data_list in loads(creators).values():
+        for name_data in name_data_list:
+            values.extend(name_data.values())
+    return "\n".join(values).casefold()
+
 
 def create_library_at(path: Path, /) -> sqlite3.Connection:
     path.parent.mkdir(exist_ok=True, parents=True)
-    connection = sqlite3.connect(path)
+    connection = connect_to_library(path)
     cursor = connection.cursor()
 
-    current_path = Path(__file__).resolve()
-    ddl_path = current_path.parent / "ddl" / "main.sql"
-
-    cursor.executescript(ddl_path.read_text("utf-8"))
+    cursor.executescript(get_ddl_path("main").read_text("utf-8"))
     connection.commit()
+    upgrade_library(connection)
     return connection
 
 
 def open_library_at(path: Path, /) -> sqlite3.Connection:
     if path.exists():
-        return sqlite3.connect(path)
+        connection = connect_to_library(path)
+        upgrade_library(connection)
+        return connection
     return create_library_at(path)
 
 
+@cache
+def supports_search_index() -> bool:
+    """Tell whether SQLite has FTS5 with the trigram tokenizer (3.34+)."""
+    connection = sqlite3.connect(":memory:")
+    try:
+        connection.execute(
+            "create virtual table probe using fts5(text, tokenize = 'trigram')"
+        )
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        connection.close()
+    return True
+
+
+def has_search_index(connection: sqlite3.Connection, /) -> bool:
+    """Tell whether item_fts can be used to prefilter searches."""
+    return supports_search_index() and _has_table(connection, "item_fts")
+
+
+def _has_table(connection: sqlite3.Connection, name: str, /) -> bool:
+    return connection.execute(
+        """
+            select 1
+            from sqlite_master
+            where type = 'table' and name = ?
+        """,
+        (name,)
+    ).fetchone() is not None
+
+
+def upgrade_library(connection: sqlite3.Connection, /) -> None:
+    """Add the schema objects older libraries were created without."""
+    cursor = connection.cursor()
+
+    # Writes to items, by any client, queue them up to be reindexed
+    cursor.executescript(get_ddl_path("item_fts_stale").read_text("utf-8"))
+
+    # Without trigram support, searches fall back to scanning the items and
+    # the queue keeps growing until a newer SQLite opens the library
+    if supports_search_index() and not _has_table(connection, "item_fts"):
+        cursor.executescript(get_ddl_path("item_fts").read_text("utf-8"))
+
+    cursor.executescript(
+        get_ddl_path("collection_entry_indexes").read_text("utf-8")
+    )
+
+    update_search_index(connection)
+    connection.commit()
+    cursor.close()
+
+
+def update_search_index(connection: sqlite3.Connection, /) -> None:
+    """Reindex the items written since item_fts was last updated.
+
+    Call it in the transaction that writes the items, so searches never see
+    the index lag behind.
+    """
+    if not has_search_index(connection):
+        return
+
+    rows = connection.execute(
+        """
+            select stale.item, item.field_data, item.creators
+            from item_fts_stale stale
+            left join item on item.rowid = stale.item
+        """
+    ).fetchall()
+    if not rows:
+        return
+
+    connection.executemany(
+        "delete from item_fts where rowid = ?",
+        [(rowid,) for rowid, *_ in rows]
+    )
+    connection.executemany(
+        "insert into item_fts (rowid, text) values (?, ?)",
+        [
+            (rowid, get_item_search_text(field_data, creators))
+            for rowid, field_data, creators in rows
+            # Deleted items have nothing left to index
+            if field_data is not None
+        ]
+    )
+    connection.execute("delete from item_fts_stale")
+
+
 def get_connection_from_args(
         parsed_args: argparse.Namespace,
         /
@@ -51,3 +216,49 @@ def get_connection_from_args(
             return library_path, open_library_at(library_path)
         else:
             return library_path, create_library_at(library_path)
+
+
+async def run_in_db_thread(function: Callable[..., T], /, *args) -> T:
+    """Call a function that uses the library on the database thread."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _query_executor, function, *args
+    )
+
+
+async def fetch_all_in_thread(
+        connection: sqlite3.Connection,
+        sql: str,
+        parameters=(),
+        /
+) -> list[tuple]:
+    """Run a query without blocking the event loop and return its rows."""
+    return await run_in_db_thread(_fetch_all, connection, sql, parameters)
+
+
+def _fetch_all(
+        connection: sqlite3.Connection,
+        sql: str,
+        parameters,
+        /
+) -> list[tuple]:
+    return connection.execute(sql, parameters).fetchall()
+
+
+def fetch_set(
+        connection: sqlite3.Connection,
+        sql: str,
+        parameters=(),
+        /
+) -> set:
+    """Run a query and return the values of its only column as a set."""
+    return {value for value, in connection.execute(sql, parameters)}
+
+
+def fetch_dict(
+        connection: sqlite3.Connection,
+        sql: str,
+        parameters=(),
+        /
+) -> dict:
+    """Run a query and map the first column of its rows to the second."""
+    return dict(connection.execute(sql, parameters))
@@ -0,0 +1,5 @@
+create index if not exists collection_entry_collection_item_idx
+    on collection_entry (collection, item);
+
+create index if not exists collection_entry_item_collection_idx
+    on collection_entry (item, collection);
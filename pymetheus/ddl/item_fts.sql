@@ -0,0 +1,9 @@
+create virtual table item_fts using fts5
+(
+    text,
+    tokenize = 'trigram'
+);
+
+insert or ignore into item_fts_stale (item)
+select rowid
+from item;
@@ -0,0 +1,28 @@
+create table if not exists item_fts_stale
+(
+    item integer primary key
+);
+
+create trigger if not exists item_fts_stale_after_insert
+    after insert
+    on item
+begin
+    insert or ignore into item_fts_stale (item)
+    values (new.rowid);
+end;
+
+create trigger if not exists item_fts_stale_after_update
+    after update of field_data, creators
+    on item
+begin
+    insert or ignore into item_fts_stale (item)
+    values (new.rowid);
+end;
+
+create trigger if not exists item_fts_stale_after_delete
+    after delete
+    on item
+begin
+    insert or ignore into item_fts_stale (item)
+    values (old.rowid);
+end;
@@ -0,0 +1,15 @@
+try:
+    import orjson
+except ImportError:
+    import json
+
+    loads = json.loads
+
+    def dumps(obj, /) -> str:
+        # Compact like orjson, so both write the same text
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+else:
+    loads = orjson.loads
+
+    def dumps(obj, /) -> str:
+        return orjson.dumps(obj).decode("utf-8")
@@ -1,3 +1,4 @@
+import sys
 from dataclasses import dataclass
 from typing import Self
 
@@ -6,7 +7,18 @@ from .zotero_csl_interop import ZoteroFieldName, ZoteroCreatorTypeName, \
     is_field_date
 
 
-@dataclass(frozen=True)
+# NameData attributes and the keys they're stored under in CSL-JSON
+_NAME_PARTS = (
+    ("family", "family"),
+    ("given", "given"),
+    ("suffix", "suffix"),
+    ("dropping_particle", "dropping-particle"),
+    ("non_dropping_particle", "non-dropping-particle"),
+    ("literal", "literal"),
+)
+
+
+@dataclass(frozen=True, slots=True)
 class NameData:
     family: str | None = None
     given: str | None = None
@@ -23,13 +35,19 @@ class NameData:
     _casefolded_literal: str | None = None
 
     def __init__(self, **kwargs):
-        for key, value in kwargs.items():
+        # Slots have no class-level defaults, so every part must be set
+        for key, _ in _NAME_PARTS:
+            value = kwargs.pop(key, None)
             object.__setattr__(self, key, value)
             object.__setattr__(
                 self,
                 f"_casefolded_{key}",
                 value.casefold() if value is not None else None
             )
+        if kwargs:
+            raise TypeError(
+                f"Unexpected name parts: {', '.join(kwargs)}"
+            )
 
     def __str__(self):
         if self.literal:
@@ -48,41 +66,19 @@ class NameData:
         return " ".join(parts)
 
     def as_dict(self) -> dict:
-        new_obj = {}
-
-        if self.family is not None:
-            new_obj['family'] = self.family
-        if self.given is not None:
-            new_obj['given'] = self.given
-        if self.suffix is not None:
-            new_obj['suffix'] = self.suffix
-        if self.dropping_particle is not None:
-            new_obj['dropping-particle'] = self.dropping_particle
-        if self.non_dropping_particle is not None:
-            new_obj['non-dropping-particle'] = self.non_dropping_particle
-        if self.literal is not None:
-            new_obj['literal'] = self.literal
-
-        return new_obj
+        return {
+            dict_key: value
+            for attribute, dict_key in _NAME_PARTS
+            if (value := getattr(self, attribute)) is not None
+        }
 
     @classmethod
     def from_dict(cls, d: dict, /) -> Self:
-        args = {}
-
-        if "family" in d:
-            args["family"] = d["family"]
-        if "given" in d:
-            args["given"] = d["given"]
-        if "suffix" in d:
-            args["suffix"] = d["suffix"]
-        if "dropping-particle" in d:
-            args["dropping_particle"] = d["dropping-particle"]
-        if "non-dropping-particle" in d:
-            args["non_dropping_particle"] = d["non-dropping-particle"]
-        if "literal" in d:
-            args["literal"] = d["literal"]
-
-        return cls(**args)
+        return cls(**{
+            attribute: d[dict_key]
+            for attribute, dict_key in _NAME_PARTS
+            if dict_key in d
+        })
 
     def search(self, query: str, casefolded: bool = False) -> bool:
         if not casefolded:
@@ -148,7 +144,7 @@ class NameData:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Item:
     type: ItemType
     field_data: dict[ZoteroFieldName, str]
@@ -160,19 +156,26 @@ class Item:
         return {
             "type": self.type.name,
             "field_data": self.field_data,
-            "creators": {
-                c_type: [nd.as_dict() for nd in nd_list]
-                for c_type, nd_list in self.creators.items()
-            }
+            "creators": self.creators_as_dict(),
+        }
+
+    def creators_as_dict(self) -> dict:
+        return {
+            c_type: [nd.as_dict() for nd in nd_list]
+            for c_type, nd_list in self.creators.items()
         }
 
     @classmethod
     def from_dict(cls, d: dict, /) -> Self:
+        # Interned keys compare by identity with the schema's field names
         return cls(
             type=ITEM_TYPES[d["type"]],
-            field_data=d["field_data"],
+            field_data={
+                sys.intern(field_name): value
+                for field_name, value in d["field_data"].items()
+            },
             creators={
-                ZoteroCreatorTypeName(creator_type): [
+                ZoteroCreatorTypeName(sys.intern(creator_type)): [
                     NameData.from_dict(name_data)
                     for name_data in name_data_list
                 ]
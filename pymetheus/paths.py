@@ -1,21 +1,27 @@
+from functools import cache
 from pathlib import Path
 import os
+import stat
 import sys
 
 user_home_dir = Path.home()
+_macos_user_data_dir = user_home_dir / "Library" / "Application Support"
+_xdg_default_data_home = user_home_dir / ".local" / "share"
 
 
 # https://specifications.freedesktop.org/basedir-spec/basedir-spec-latest.html
 # https://learn.microsoft.com/en-us/windows/deployment/usmt/usmt-recognized-environment-variables
 # https://developer.apple.com/library/archive/documentation/FileManagement/Conceptual/FileSystemProgrammingGuide/MacOSXDirectories/MacOSXDirectories.html
+@cache
 def get_os_user_data_dir() -> Path:
     if os.name == "posix":
         if sys.platform.startswith("darwin"):
-            return Path("~/Library/Application Support").expanduser()
+            return _macos_user_data_dir
 
-        return Path(
-            os.environ.get("XDG_DATA_HOME", "~/.local/share")
-        ).expanduser()
+        xdg_data_home = os.environ.get("XDG_DATA_HOME")
+        if not xdg_data_home:
+            return _xdg_default_data_home
+        return Path(xdg_data_home).expanduser()
     if os.name == "nt":
         return Path(os.environ["APPDATA"])
 
@@ -24,6 +30,7 @@ def get_os_user_data_dir() -> Path:
     )
 
 
+@cache
 def get_app_data_dir() -> Path:
     return get_os_user_data_dir() / "pymetheus"
 
@@ -40,31 +47,64 @@ def search_library_file_with_precedence(
         order: list[Path],
         /,
 ) -> Path | None:
-    for specified_path in order:
-        found_lib = search_library_file(specified_path)
+    # The walk is done with strings, Path objects are only made for results.
+    # The paths aren't normalized, "link/.." is the parent of the link's
+    # target like it is to os.stat.
+    directories = [
+        os.path.expanduser(specified_path) for specified_path in order
+    ]
+    for directory in directories:
+        found_lib = _search_library_file(directory)
         if found_lib:
-            return found_lib
-
-    # No library found in the specified paths, search their parents now
-    for specified_path in order:
-        for parent in specified_path.parents:
-            found_lib = search_library_file(parent)
+            return Path(found_lib)
+
+    # No library found in the specified paths, search their parents now.
+    # The paths usually share ancestors, which only need to be probed once.
+    searched = set()
+    for directory in directories:
+        parent = _get_parent(directory)
+        while parent != directory:
+            if parent in searched:
+                # So were all of its own parents
+                break
+            searched.add(parent)
+            found_lib = _search_library_file(parent)
             if found_lib:
-                return found_lib
+                return Path(found_lib)
+            directory, parent = parent, _get_parent(parent)
 
     # Sorry, no library found.
     return None
 
 
-def search_library_file(path: Path, /) -> Path | None:
-    path = path.expanduser().resolve()
-    if path.is_dir():
-        lib_path = path / get_default_lib_filename()
-        if lib_path.is_file():
-            return lib_path
+def _get_parent(path: str, /) -> str:
+    # Like Path.parents, the parents of a relative path end at "."
+    return os.path.dirname(path) or os.curdir
+
+
+def _search_library_file(path: str, /) -> str | None:
+    path_mode = _get_file_mode(path)
+    if path_mode is None:
+        return None
+
+    if stat.S_ISDIR(path_mode):
+        lib_path = os.path.join(path, get_default_lib_filename())
+        lib_path_mode = _get_file_mode(lib_path)
+        if lib_path_mode is not None and stat.S_ISREG(lib_path_mode):
+            # Only the library that is found gets its directory resolved
+            return os.path.join(
+                os.path.realpath(path), get_default_lib_filename()
+            )
         return None
 
-    if path.is_file():
-        return path
+    if stat.S_ISREG(path_mode):
+        return os.path.realpath(path)
 
     return None
+
+
+def _get_file_mode(path: str, /) -> int | None:
+    try:
+        return os.stat(path).st_mode
+    except (OSError, ValueError):
+        return None
@@ -1,6 +1,3 @@
-import argparse
-from pathlib import Path
-
 from textual import on
 from textual.app import App, ComposeResult
 from textual.binding import Binding
@@ -8,7 +5,9 @@ from textual.containers import Horizontal
 from textual.reactive import reactive
 from textual.widgets import Header, Footer
 
-from pymetheus.db import get_connection_from_args
+from pymetheus.cli import get_parsed_args
+from pymetheus.db import get_connection_from_args, connect_for_reading, \
+    fetch_dict, run_in_db_thread
 from pymetheus.ui.quit_confirm_screen import QuitConfirmScreen
 from pymetheus.ui.widgets.collections_panel import CollectionsPanel
 from pymetheus.ui.widgets.fields_panel import FieldsPanel
@@ -33,6 +32,10 @@ class PymetheusApp(App):
         Binding("f4", "app.focus('creators-dt')", "Contributors"),
     ]
     ENABLE_COMMAND_PALETTE = False
+    # Installed screens are composed once and reused every time they're shown
+    SCREENS = {
+        "quit_confirm": QuitConfirmScreen,
+    }
 
     selected_collection_id: reactive[str | None] = reactive(None)
     selected_item_rowid: reactive[int | None] = reactive(None)
@@ -51,24 +54,32 @@ class PymetheusApp(App):
     def __init__(self):
         super().__init__()
 
-        main_argparser = argparse.ArgumentParser()
-
-        main_argparser.add_argument(
-            "-L", "--library",
-            help="Path to the library to use",
-            type=Path,
-            metavar="LIBRARY_PATH",
+        self.db_path, self.db_connection = get_connection_from_args(
+            get_parsed_args()
         )
-
-        parsed_args = main_argparser.parse_args()
-        self.db_path, self.db_connection = get_connection_from_args(parsed_args)
         self.sub_title = self.db_path
+        # Used by the database thread, while the UI thread writes through
+        # db_connection
+        self.db_read_connection = connect_for_reading(self.db_path)
+
+        # Collection rowids to names, loaded and kept up to date by
+        # CollectionsPanel
+        self.collection_names: dict[int, str] = {}
+
+    async def load_collection_names(self) -> None:
+        self.collection_names = await run_in_db_thread(
+            fetch_dict,
+            self.db_read_connection,
+            """
+                select rowid, name from collection
+            """
+        )
 
     def compose(self) -> ComposeResult:
         yield Header()
         with Horizontal(id="panel-container"):
             yield CollectionsPanel(self.db_connection)
-            yield ItemsPanel(self.db_connection) \
+            yield ItemsPanel(self.db_connection, self.db_read_connection) \
                 .data_bind(PymetheusApp.selected_collection_id)
             yield FieldsPanel(self.db_connection) \
                 .data_bind(PymetheusApp.selected_item_rowid)
@@ -84,4 +95,4 @@ class PymetheusApp(App):
         await self.recompose()
 
     def action_check_quit(self) -> None:
-        self.push_screen(QuitConfirmScreen())
+        self.push_screen("quit_confirm")
@@ -13,8 +13,12 @@ from textual.widgets import Tree, Label, Input, Button
 from textual.widgets._tree import TreeNode
 
 from pymetheus.citeproc_serializer import serialize_item
+from pymetheus.json_backend import loads
 from pymetheus.models_pymetheus import Item
 
+# No collection has been posted yet, not even the root's None
+_NOTHING_SELECTED = object()
+
 
 class CollectionsPanel(Tree):
     BINDINGS = [
@@ -36,12 +40,20 @@ class CollectionsPanel(Tree):
     def on_tree_node_highlighted(self, event: Tree.NodeHighlighted) -> None:
         event.stop()
         self.selected_node = event.node
-        self.post_message(self.Selected(event.node.data))
+        self.post_selected(event.node.data)
 
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
         event.stop()
         self.selected_node = event.node
-        self.post_message(self.Selected(event.node.data))
+        self.post_selected(event.node.data)
+
+    def post_selected(self, rowid: int | None, /) -> None:
+        """Post Selected, unless the collection is already selected"""
+        # Selecting a node also highlights it, which would post it twice
+        if rowid == self._last_selected:
+            return
+        self._last_selected = rowid
+        self.post_message(self.Selected(rowid))
 
     @on(Tree.NodeCollapsed)
     def on_collapsed(self, event: Tree.NodeCollapsed) -> None:
@@ -49,39 +61,39 @@ class CollectionsPanel(Tree):
         if event.node == self.root:
             self.root.expand()
             self.select_node(self.root)
-            self.post_message(self.Selected(self.root.data))
+            self.post_selected(self.root.data)
 
     def __init__(self, db_connection: sqlite3.Connection):
         super().__init__(label="My Library", data=None, id="collections-tree")
         self.db_connection = db_connection
+        self._last_selected: int | None | object = _NOTHING_SELECTED
 
-    def on_mount(self):
-        cur = self.db_connection.cursor()
-        cols = cur.execute("""
-            select rowid, name from collection
-        """).fetchall()
-        for rowid, col_name in cols:
-            self.root.add_leaf(col_name, data=rowid)
-        cur.close()
+    async def on_mount(self):
         self.root.expand()
         self.select_node(self.root)
-        self.post_message(self.Selected(self.root.data))
+        self.post_selected(self.root.data)
+
+        # The tree is shown with just the library while the collections load
+        await self.app.load_collection_names()
+        add_leaf = self.root.add_leaf
+        with self.app.batch_update():
+            for rowid, col_name in self.app.collection_names.items():
+                add_leaf(col_name, data=rowid)
 
     def action_delete_coll(self):
         node: TreeNode = self.selected_node
         if node.data is None:
             return
 
-        cur = self.db_connection.cursor()
-        cur.execute(
-            """
-                delete from collection
-                where rowid = ?
-            """,
-            (node.data,)
-        )
-        self.db_connection.commit()
-        cur.close()
+        with self.db_connection:
+            self.db_connection.execute(
+                """
+                    delete from collection
+                    where rowid = ?
+                """,
+                (node.data,)
+            )
+        del self.app.collection_names[node.data]
         node.remove()
         self.action_select_cursor()
 
@@ -97,44 +109,36 @@ class CollectionsPanel(Tree):
         if new is None:
             return
 
-        cur = self.db_connection.cursor()
-        cur.execute(
-            """
-                update collection
-                set name = ?
-                where rowid = ?
-            """,
-            (new, node.data)
-        )
-        self.db_connection.commit()
+        with self.db_connection:
+            self.db_connection.execute(
+                """
+                    update collection
+                    set name = ?
+                    where rowid = ?
+                """,
+                (new, node.data)
+            )
+        self.app.collection_names[node.data] = new
         node.label = new
 
     @work
     async def action_create_coll(self):
-        cur = self.db_connection.cursor()
+        existing_names = set(self.app.collection_names.values())
         counter = 1
-        while True:
-            new_name = f"Collection {counter}"
-            if not cur.execute(
-                    """
-                    select 1
-                    from collection
-                    where name = ?
-                """,
-                    (new_name,)
-            ).fetchone():
-                break
+        while f"Collection {counter}" in existing_names:
             counter += 1
-
-        rowid, = cur.execute(
-            """
-                insert into collection (name)
-                values (?)
-                returning rowid
-            """,
-            (new_name,)
-        ).fetchone()
-        self.db_connection.commit()
+        new_name = f"Collection {counter}"
+
+        with self.db_connection:
+            rowid, = self.db_connection.execute(
+                """
+                    insert into collection (name)
+                    values (?)
+                    returning rowid
+                """,
+                (new_name,)
+            ).fetchone()
+        self.app.collection_names[rowid] = new_name
         self.root.add_leaf(new_name, data=rowid)
 
     @work
@@ -144,8 +148,7 @@ class CollectionsPanel(Tree):
             return
 
         ids_to_items = {}
-        cur = self.db_connection.cursor()
-        items = cur.execute(
+        items = self.db_connection.execute(
             """
                 select item.rowid, item.type, item.field_data, item.creators
                 from item
@@ -154,12 +157,11 @@ class CollectionsPanel(Tree):
             """,
             (node.data,)
         ).fetchall()
-        cur.close()
         for i_rowid, i_type, i_fdata, i_creators in items:
             item = Item.from_triplet(
                 item_type=i_type,
-                field_data=json.loads(i_fdata),
-                creators=json.loads(i_creators)
+                field_data=loads(i_fdata),
+                creators=loads(i_creators)
             )
             item_bibid = item.try_to_generate_id()
             if not item_bibid:
@@ -1,5 +1,6 @@
-import json
 import sqlite3
+from functools import cache
+from typing import Literal
 
 from textual import on, work
 from textual.app import ComposeResult
@@ -10,7 +11,9 @@ from textual.widget import Widget
 from textual.widgets import Static, DataTable, OptionList, Label, Button
 from textual.widgets._option_list import Option
 
-from pymetheus.models_zotero import ItemType
+from pymetheus.db import update_search_index
+from pymetheus.json_backend import dumps, loads
+from pymetheus.models_zotero import ItemType, ITEM_TYPES
 from pymetheus.ui.field_editor_screens.date_field_editor import DateFieldEditor
 from pymetheus.ui.field_editor_screens.standard_field_editor import \
     StandardFieldEditor
@@ -50,23 +53,24 @@ class FieldsPanel(Static):
         )
 
     def on_mount(self) -> None:
-        fields = self.query_one("#fields-dt", DataTable)
+        self._fields_dt = fields = self.query_one("#fields-dt", DataTable)
         fields.add_column("Field", key="field")
         fields.add_column("Value", key="value")
 
-        creators = self.query_one("#creators-dt", DataTable)
+        self._creators_dt = creators = self.query_one(
+            "#creators-dt", DataTable
+        )
         creators.add_column("Contribution", key="type")
         creators.add_column("Name", key="name")
 
     def watch_selected_item_rowid(self, value: int | None) -> None:
-        field_dt = self.query_one("#fields-dt", DataTable)
+        field_dt = self._fields_dt
         field_dt.clear()
-        creator_dt = self.query_one("#creators-dt", DataTable)
+        creator_dt = self._creators_dt
         creator_dt.clear()
         if value is None:
             return
-        cur = self.db_connection.cursor()
-        data = cur.execute(
+        data = self.db_connection.execute(
             """
                 select type, field_data, creators
                 from item
@@ -74,69 +78,80 @@ class FieldsPanel(Static):
             """,
             (value,)
         ).fetchone()
-        cur.close()
         if data is None:
             return
         i_type, i_fdata, i_creators = data
         item = Item.from_triplet(
             item_type=i_type,
-            field_data=json.loads(i_fdata),
-            creators=json.loads(i_creators),
+            field_data=loads(i_fdata),
+            creators=loads(i_creators),
         )
         self.item_object = item
-        field_dt.add_row(
-            FIELD_NAMES["itemType"],
-            ITEM_TYPE_NAMES[item.type.name],
-            key="itemType",
-        )
-        for any_field in item.type.fields:
+        # The rows are added one by one because add_rows can't set row keys
+        with self.app.batch_update():
             field_dt.add_row(
-                FIELD_NAMES[any_field.name],
-                item.field_data.get(any_field.name, None),
-                key=any_field.base_field
+                FIELD_NAMES["itemType"],
+                ITEM_TYPE_NAMES[item.type.name],
+                key="itemType",
             )
-        if field_dt.rows:
-            field_dt.move_cursor(row=0)
-            field_dt.action_select_cursor()
-        for creator_type in item.type.creator_types:
-            if creator_type in item.creators:
-                for i, creator in enumerate(item.creators[creator_type]):
-                    creator_dt.add_row(
-                        CREATOR_TYPE_NAMES[creator_type],
-                        str(creator),
-                        key=f"{creator_type}.{i}"
-                    )
-        if creator_dt.rows:
-            creator_dt.move_cursor(row=0)
-            creator_dt.action_select_cursor()
+            field_names = FIELD_NAMES
+            field_data = item.field_data
+            add_field_row = field_dt.add_row
+            for any_field in item.type.fields:
+                add_field_row(
+                    field_names[any_field.name],
+                    field_data.get(any_field.name, None),
+                    key=any_field.base_field
+                )
+            if field_dt.rows:
+                field_dt.move_cursor(row=0)
+                field_dt.action_select_cursor()
+            creators = item.creators
+            add_creator_row = creator_dt.add_row
+            for creator_type in item.type.creator_types:
+                if creator_type in creators:
+                    creator_type_name = CREATOR_TYPE_NAMES[creator_type]
+                    for i, creator in enumerate(creators[creator_type]):
+                        add_creator_row(
+                            creator_type_name,
+                            str(creator),
+                            key=f"{creator_type}.{i}"
+                        )
+            if creator_dt.rows:
+                creator_dt.move_cursor(row=0)
+                creator_dt.action_select_cursor()
 
     @on(DataTable.RowHighlighted)
     def on_dt_row_highlight(self, event: DataTable.RowHighlighted):
         event.stop()
-        fields = self.query_one("#fields-dt", DataTable)
-        creators = self.query_one("#creators-dt", DataTable)
+        fields = self._fields_dt
+        creators = self._creators_dt
         if event.data_table == fields:
             self.selected_field_name = event.row_key.value
         elif event.data_table == creators:
             creator_type, index = event.row_key.value.split(".")
             self.selected_creator = (creator_type, int(index))
 
-    def update_item_wo_commit(self, item: Item, rowid: int) -> None:
-        item_dict = item.as_dict()
-
+    def update_item_wo_commit(
+            self,
+            item: Item,
+            rowid: int,
+            changed: Literal["field_data", "creators"],
+    ) -> None:
+        """Store the column of the item that changed"""
+        if changed == "field_data":
+            value = item.field_data
+        else:
+            value = item.creators_as_dict()
         self.db_connection.execute(
-            """
+            f"""
                 update item
-                set type = ?, field_data = ?, creators = ?
+                set {changed} = ?
                 where rowid = ?
             """,
-            (
-                item_dict["type"],
-                json.dumps(item_dict["field_data"], ensure_ascii=False),
-                json.dumps(item_dict["creators"], ensure_ascii=False),
-                rowid,
-            )
+            (dumps(value), rowid)
         )
+        update_search_index(self.db_connection)
 
     async def action_clear_field(self) -> None:
         if self.selected_item_rowid is None:
@@ -144,8 +159,8 @@ class FieldsPanel(Static):
         if self.item_object is None:
             return
 
-        fields = self.query_one("#fields-dt", DataTable)
-        creators = self.query_one("#creators-dt", DataTable)
+        fields = self._fields_dt
+        creators = self._creators_dt
 
         if fields.has_focus:
             if self.selected_field_name == "itemType":
@@ -155,8 +170,10 @@ class FieldsPanel(Static):
                 await fields.recompose()
                 return
             del item.field_data[self.selected_field_name]
-            self.update_item_wo_commit(item, self.selected_item_rowid)
-            self.db_connection.commit()
+            with self.db_connection:
+                self.update_item_wo_commit(
+                    item, self.selected_item_rowid, "field_data"
+                )
             fields.update_cell(self.selected_field_name, "value", None)
             return
         elif creators.has_focus:
@@ -168,8 +185,10 @@ class FieldsPanel(Static):
             del item.creators[sel_c_type][sel_c_index]
             if not item.creators[sel_c_type]:
                 del item.creators[sel_c_type]
-            self.update_item_wo_commit(item, self.selected_item_rowid)
-            self.db_connection.commit()
+            with self.db_connection:
+                self.update_item_wo_commit(
+                    item, self.selected_item_rowid, "creators"
+                )
             creators.remove_row(f"{sel_c_type}.{sel_c_index}")
             return
 
@@ -180,8 +199,8 @@ class FieldsPanel(Static):
         if self.item_object is None:
             return
 
-        fields = self.query_one("#fields-dt", DataTable)
-        creators = self.query_one("#creators-dt", DataTable)
+        fields = self._fields_dt
+        creators = self._creators_dt
 
         if fields.has_focus:
             if self.selected_field_name == "itemType":
@@ -202,8 +221,10 @@ class FieldsPanel(Static):
             if new_value is None:
                 return
             item.field_data[self.selected_field_name] = new_value
-            self.update_item_wo_commit(item, self.selected_item_rowid)
-            self.db_connection.commit()
+            with self.db_connection:
+                self.update_item_wo_commit(
+                    item, self.selected_item_rowid, "field_data"
+                )
             fields.update_cell(
                 self.selected_field_name,
                 "value",
@@ -227,13 +248,17 @@ class FieldsPanel(Static):
                 del item.creators[sel_c_type][sel_c_index]
                 if not item.creators[sel_c_type]:
                     del item.creators[sel_c_type]
-                self.update_item_wo_commit(item, self.selected_item_rowid)
-                self.db_connection.commit()
+                with self.db_connection:
+                    self.update_item_wo_commit(
+                        item, self.selected_item_rowid, "creators"
+                    )
                 creators.remove_row(f"{sel_c_type}.{sel_c_index}")
                 return
             item.creators[sel_c_type][sel_c_index] = new_value
-            self.update_item_wo_commit(item, self.selected_item_rowid)
-            self.db_connection.commit()
+            with self.db_connection:
+                self.update_item_wo_commit(
+                    item, self.selected_item_rowid, "creators"
+                )
             creators.update_cell(
                 f"{sel_c_type}.{sel_c_index}",
                 "name",
@@ -248,7 +273,7 @@ class FieldsPanel(Static):
         if self.item_object is None:
             return
 
-        creators = self.query_one("#creators-dt", DataTable)
+        creators = self._creators_dt
         item: Item = self.item_object
         creator_type = await self.app.push_screen_wait(
             CreatorTypeSelectionScreen(item.type)
@@ -258,8 +283,10 @@ class FieldsPanel(Static):
         if creator_type not in item.creators:
             item.creators[creator_type] = []
         item.creators[creator_type].append(NameData())
-        self.update_item_wo_commit(item, self.selected_item_rowid)
-        self.db_connection.commit()
+        with self.db_connection:
+            self.update_item_wo_commit(
+                item, self.selected_item_rowid, "creators"
+            )
         creators.add_row(
             CREATOR_TYPE_NAMES[creator_type],
             "",
@@ -275,12 +302,11 @@ class CreatorTypeSelectionScreen(ModalScreen[str | None]):
     selected_type: reactive[str | None] = reactive(None)
 
     @on(OptionList.OptionHighlighted)
-    def highlighted(self, event: OptionList.OptionHighlighted) -> None:
-        event.stop()
-        self.selected_type = event.option.id
-
     @on(OptionList.OptionSelected)
-    def selected(self, event: OptionList.OptionSelected) -> None:
+    def option_changed(
+            self,
+            event: OptionList.OptionHighlighted | OptionList.OptionSelected
+    ) -> None:
         event.stop()
         self.selected_type = event.option.id
 
@@ -289,10 +315,7 @@ class CreatorTypeSelectionScreen(ModalScreen[str | None]):
             yield Label("Select the type of contributor to create",
                         classes="question")
             yield OptionList(
-                *[
-                    Option(prompt=CREATOR_TYPE_NAMES[codename], id=codename)
-                    for codename in self.item_type.creator_types
-                ]
+                *_get_creator_type_options(self.item_type.name)
             )
             with Widget(classes="modal-buttons"):
                 yield Button("OK", variant="primary", id="ok")
@@ -306,3 +329,11 @@ class CreatorTypeSelectionScreen(ModalScreen[str | None]):
             self.dismiss(None)
         elif event.button.id == "ok":
             self.dismiss(self.selected_type)
+
+
+@cache
+def _get_creator_type_options(item_type_name: str, /) -> tuple[Option, ...]:
+    return tuple(
+        Option(prompt=CREATOR_TYPE_NAMES[codename], id=codename)
+        for codename in ITEM_TYPES[item_type_name].creator_types
+    )
@@ -1,5 +1,5 @@
-import json
 import sqlite3
+from functools import lru_cache
 
 from textual import on, work
 from textual.app import ComposeResult
@@ -8,15 +8,56 @@ from textual.containers import VerticalScroll
 from textual.message import Message
 from textual.reactive import reactive
 from textual.screen import ModalScreen
+from textual.timer import Timer
 from textual.widget import Widget
 from textual.widgets import Static, Input, DataTable, Label, SelectionList, \
     Button, OptionList
 from textual.widgets._data_table import RowKey
 from textual.widgets._option_list import Option
 
-from pymetheus.models_pymetheus import Item
+from pymetheus.db import fetch_all_in_thread, fetch_set, has_search_index, \
+    run_in_db_thread, update_search_index
+from pymetheus.json_backend import loads
+from pymetheus.models_pymetheus import Item, NameData
+from pymetheus.models_zotero import ITEM_TYPES
 from pymetheus.zotero_csl_interop import ITEM_TYPE_NAMES
 
+SEARCH_DEBOUNCE_SECONDS = 0.2
+
+# Items are added to the table in pages as it's scrolled towards its end
+ITEMS_PAGE_SIZE = 100
+ITEMS_LOAD_AHEAD_ROWS = 20
+
+
+def _get_main_creator_sql() -> str:
+    """Build an SQL expression for the JSON of an item's main creator.
+
+    This is the first creator of the first creator type of the item's type,
+    the same one Item.get_main_creator returns.
+    """
+    types_by_main_creator_type: dict[str, list[str]] = {}
+    for type_name, item_type in ITEM_TYPES.items():
+        if item_type.creator_types:
+            types_by_main_creator_type.setdefault(
+                item_type.creator_types[0], []
+            ).append(type_name)
+    branches = "".join(
+        f"""
+            when type in ({", ".join(f"'{name}'" for name in type_names)})
+            then json_extract(creators, '$."{creator_type}"[0]')
+        """
+        for creator_type, type_names in types_by_main_creator_type.items()
+    )
+    return f"case {branches} end"
+
+
+_MAIN_CREATOR_SQL = _get_main_creator_sql()
+
+_ITEM_TYPE_OPTIONS = [
+    Option(prompt=human_name, id=codename)
+    for codename, human_name in ITEM_TYPE_NAMES.items()
+]
+
 
 class ItemsPanel(Static):
     BINDINGS = [
@@ -38,9 +79,23 @@ class ItemsPanel(Static):
             super().__init__()
             self.rowid = rowid
 
-    def __init__(self, db_connection: sqlite3.Connection):
+    def __init__(
+            self,
+            db_connection: sqlite3.Connection,
+            db_read_connection: sqlite3.Connection,
+    ):
         super().__init__()
         self.db_connection = db_connection
+        # Only used on the database thread
+        self.db_read_connection = db_read_connection
+        self._use_search_index = has_search_index(db_connection)
+        self._search_timer: Timer | None = None
+
+        # Lets a refresh or page load that finishes late notice it's stale
+        self._refresh_count = 0
+        self._loading_rows_for: int | None = None
+        self._unloaded_rowids: list[int] = []
+        self._loaded_search_string: str | None = None
 
     def compose(self) -> ComposeResult:
         with Widget(id="item-menu"):
@@ -53,11 +108,20 @@ class ItemsPanel(Static):
             zebra_stripes=True
         )
 
+    @on(Input.Changed)
+    def on_input_changed(self, event: Input.Changed) -> None:
+        event.stop()
+        if event.input.id == "search-item":
+            self.search_string = event.value
+
     @on(Input.Submitted)
     def on_input_submit(self, event: Input.Submitted) -> None:
         event.stop()
         if event.input.id == "search-item":
+            # Enter doesn't wait for the typing to settle
             self.search_string = event.value
+            self._cancel_search_refresh()
+            self.refresh_dt()
 
     @on(DataTable.RowSelected)
     def on_select(self, event: DataTable.RowSelected) -> None:
@@ -66,108 +130,150 @@ class ItemsPanel(Static):
         self.post_message(self.Selected(event.row_key.value))
 
     @on(DataTable.RowHighlighted)
-    def on_highlight(self, event: DataTable.RowHighlighted) -> None:
+    async def on_highlight(self, event: DataTable.RowHighlighted) -> None:
         event.stop()
         self.selected_row_key = event.row_key
         self.post_message(self.Selected(event.row_key.value))
+        await self.load_more_rows_if_near_end()
 
     def on_mount(self) -> None:
-        dt = self.query_one("#items-dt", DataTable)
+        self._items_dt = dt = self.query_one("#items-dt", DataTable)
         dt.add_column("Type", key="type")
         dt.add_column("Title", key="title")
         dt.add_column("Creator", key="creator")
 
+        self.watch(dt, "scroll_y", self.load_more_rows_if_near_end, init=False)
         self.watch(self, "selected_collection_id", self.refresh_dt)
-        self.watch(self, "search_string", self.refresh_dt)
+        self.watch(
+            self, "search_string", self.schedule_search_refresh, init=False
+        )
 
-    def refresh_dt(self) -> None:
-        dt = self.query_one("#items-dt", DataTable)
-        dt.clear()
-        cur = self.db_connection.cursor()
-        if self.selected_collection_id is not None:
-            items = cur.execute(
-                """
-                    select item.rowid, item.type, item.field_data, item.creators
-                    from collection_entry entry
-                    join item on entry.item = item.rowid
-                    where entry.collection = ?
-                """,
-                (self.selected_collection_id,)
-            ).fetchall()
-        else:
-            items = cur.execute("""
-                select item.rowid, item.type, item.field_data, item.creators
-                from item
-            """).fetchall()
-        cur.close()
+    def schedule_search_refresh(self) -> None:
+        """Refresh the table once the search string stops changing"""
+        self._cancel_search_refresh()
+        self._search_timer = self.set_timer(
+            SEARCH_DEBOUNCE_SECONDS, self._refresh_after_typing
+        )
+
+    def _cancel_search_refresh(self) -> None:
+        if self._search_timer is not None:
+            self._search_timer.stop()
+            self._search_timer = None
+
+    def _refresh_after_typing(self) -> None:
+        self._search_timer = None
+        self.refresh_dt()
+
+    @work(exclusive=True, group="items-refresh")
+    async def refresh_dt(self) -> None:
+        self._refresh_count += 1
+        refresh_count = self._refresh_count
+        # Pages of the old results mustn't be loaded while the query runs
+        self._unloaded_rowids = []
 
         if self.search_string:
             search_string = self.search_string.casefold()
         else:
             search_string = None
-        for i_rowid, i_type, i_fdata, i_creators in items:
-            item = Item.from_triplet(
-                item_type=i_type,
-                field_data=json.loads(i_fdata),
-                creators=json.loads(i_creators),
-            )
-            if (
-                    (search_string is None)
-                    or item.search(search_string, casefolded=True)
-            ):
-                dt.add_row(
-                    ITEM_TYPE_NAMES[item.type.name],
-                    item.field_data.get("title", ""),
-                    str(item.get_main_creator() or ""),
-                    key=str(i_rowid),
-                )
+
+        sql, params = _get_item_rowids_query(
+            self.selected_collection_id, search_string, self._use_search_index
+        )
+        rows = await fetch_all_in_thread(self.db_read_connection, sql, params)
+        if refresh_count != self._refresh_count:
+            return
+
+        dt = self._items_dt
+        dt.clear()
+        self._unloaded_rowids = [i_rowid for i_rowid, in rows]
+        self._loaded_search_string = search_string
+
+        await self.load_more_rows()
+        if refresh_count != self._refresh_count:
+            return
         if dt.rows:
             dt.move_cursor(row=0)
             dt.action_select_cursor()
 
+    async def load_more_rows(self) -> None:
+        """Add the next page of items found by the last refresh to the table"""
+        refresh_count = self._refresh_count
+        if self._loading_rows_for == refresh_count:
+            return
+        self._loading_rows_for = refresh_count
+        try:
+            await self._load_more_rows(refresh_count)
+        finally:
+            if self._loading_rows_for == refresh_count:
+                self._loading_rows_for = None
+
+    async def _load_more_rows(self, refresh_count: int) -> None:
+        dt = self._items_dt
+        search_string = self._loaded_search_string
+        unloaded_rowids = self._unloaded_rowids
+
+        add_row = dt.add_row
+        added_count = 0
+        while unloaded_rowids and added_count < ITEMS_PAGE_SIZE:
+            page_rowids = unloaded_rowids[:ITEMS_PAGE_SIZE]
+            del unloaded_rowids[:ITEMS_PAGE_SIZE]
+
+            table_rows = await run_in_db_thread(
+                _get_table_rows,
+                self.db_read_connection,
+                page_rowids,
+                search_string,
+            )
+            if refresh_count != self._refresh_count:
+                return
+
+            for *cells, key in table_rows:
+                add_row(*cells, key=key)
+            added_count += len(table_rows)
+
+    async def load_more_rows_if_near_end(self) -> None:
+        dt = self._items_dt
+        if not self._unloaded_rowids:
+            return
+        if (
+                dt.cursor_row >= dt.row_count - ITEMS_LOAD_AHEAD_ROWS
+                or dt.scroll_y >= dt.max_scroll_y - ITEMS_LOAD_AHEAD_ROWS
+        ):
+            await self.load_more_rows()
+
     def action_duplicate_item(self):
         old_rowid = self.selected_row_key.value
-        cur = self.db_connection.cursor()
-        i_rowid, i_type, i_fdata, i_creators = cur.execute(
-            """
-                insert into item (type, field_data, creators)
-                select type, field_data, creators
-                from item
-                where rowid = ?
-                limit 1
-                returning rowid, type, field_data, creators
-            """,
-            (old_rowid,)
-        ).fetchone()
-        self.db_connection.commit()
-        dt = self.query_one("#items-dt", DataTable)
-        item = Item.from_triplet(
-            item_type=i_type,
-            field_data=json.loads(i_fdata),
-            creators=json.loads(i_creators),
-        )
-        dt.add_row(
-            ITEM_TYPE_NAMES[item.type.name],
-            item.field_data.get("title", ""),
-            str(item.get_main_creator() or ""),
-            key=str(i_rowid),
-        )
+        with self.db_connection:
+            i_rowid, = self.db_connection.execute(
+                """
+                    insert into item (type, field_data, creators)
+                    select type, field_data, creators
+                    from item
+                    where rowid = ?
+                    limit 1
+                    returning rowid
+                """,
+                (old_rowid,)
+            ).fetchone()
+            update_search_index(self.db_connection)
+        dt = self._items_dt
+        # The copy looks exactly like the original in the table
+        dt.add_row(*dt.get_row(self.selected_row_key), key=str(i_rowid))
 
     def action_delete_item(self):
         if self.selected_row_key is None:
             return
 
-        cur = self.db_connection.cursor()
-        cur.execute(
-            """
-                delete from item
-                where rowid = ?
-            """,
-            (self.selected_row_key.value,)
-        )
-        self.db_connection.commit()
-        cur.close()
-        dt = self.query_one("#items-dt", DataTable)
+        with self.db_connection:
+            self.db_connection.execute(
+                """
+                    delete from item
+                    where rowid = ?
+                """,
+                (self.selected_row_key.value,)
+            )
+            update_search_index(self.db_connection)
+        dt = self._items_dt
         dt.remove_row(self.selected_row_key)
         self.selected_row_key = None
         dt.action_select_cursor()
@@ -186,30 +292,168 @@ class ItemsPanel(Static):
         )
         if item_type is None:
             return
-        cur = self.db_connection.cursor()
-        i_rowid, i_type, i_fdata, i_creators = cur.execute(
-            """
-                insert into item (type, field_data, creators)
-                values (?, '{}', '{}')
-                returning rowid, type, field_data, creators
-            """,
-            (item_type,)
-        ).fetchone()
-        self.db_connection.commit()
-        dt = self.query_one("#items-dt", DataTable)
-        item = Item.from_triplet(
-            item_type=i_type,
-            field_data=json.loads(i_fdata),
-            creators=json.loads(i_creators),
-        )
-        dt.add_row(
-            ITEM_TYPE_NAMES[item.type.name],
-            item.field_data.get("title", ""),
-            str(item.get_main_creator() or ""),
+        with self.db_connection:
+            i_rowid, = self.db_connection.execute(
+                """
+                    insert into item (type, field_data, creators)
+                    values (?, '{}', '{}')
+                    returning rowid
+                """,
+                (item_type,)
+            ).fetchone()
+            update_search_index(self.db_connection)
+        # A new item has no title or creators to show yet
+        self._items_dt.add_row(
+            ITEM_TYPE_NAMES[item_type],
+            "",
+            "",
             key=str(i_rowid),
         )
 
 
+def _get_table_rows(
+        connection: sqlite3.Connection,
+        rowids: list[int],
+        search_string: str | None,
+        /
+) -> list[tuple[str, str, str, str]]:
+    """Get the table cells and keys of the given items matching the search.
+
+    The items are parsed and searched here, on the database thread, so the
+    event loop only has to add the rows.
+    """
+    rows = connection.execute(
+        f"""
+            select
+                rowid,
+                type,
+                coalesce(json_extract(field_data, '$.title'), ''),
+                {_MAIN_CREATOR_SQL},
+                {"null" if search_string is None else "field_data"},
+                {"null" if search_string is None else "creators"}
+            from item
+            where rowid in ({", ".join("?" * len(rowids))})
+        """,
+        rowids
+    ).fetchall()
+    rows_by_rowid = {row[0]: row for row in rows}
+
+    item_type_names = ITEM_TYPE_NAMES
+    table_rows = []
+    for rowid in rowids:
+        row = rows_by_rowid.get(rowid)
+        if row is None:
+            # Deleted since the refresh
+            continue
+        i_rowid, i_type, i_title, i_main_creator, i_fdata, i_creators = row
+        if search_string is not None:
+            item = _parse_item(i_type, i_fdata, i_creators)
+            if not item.search(search_string, casefolded=True):
+                continue
+        table_rows.append((
+            item_type_names[i_type],
+            i_title,
+            _format_main_creator(i_main_creator),
+            str(i_rowid),
+        ))
+    return table_rows
+
+
+@lru_cache(maxsize=4096)
+def _parse_item(
+        i_type: str, i_fdata: str, i_creators: str, /
+) -> Item:
+    """Build an item from its stored JSON, reusing it on later refreshes.
+
+    The results are shared between calls, so they must not be modified.
+    """
+    return Item.from_triplet(
+        item_type=i_type,
+        field_data=loads(i_fdata),
+        creators=loads(i_creators),
+    )
+
+
+@lru_cache(maxsize=4096)
+def _format_main_creator(name_json: str | None, /) -> str:
+    if name_json is None:
+        return ""
+    return str(NameData.from_dict(loads(name_json)))
+
+
+def _get_item_rowids_query(
+        collection_id: int | None,
+        casefolded_query: str | None,
+        use_search_index: bool = True,
+        /
+) -> tuple[str, list]:
+    """Build the query for the rowids of the items to list.
+
+    A search only narrows down the candidates here, Item.search has the final
+    say. Every word of a matching query is in the item's search text, which
+    is what item_fts indexes. Without the index, the search text of every
+    item is scanned instead.
+    """
+    conditions = []
+    params = []
+    if collection_id is not None:
+        source = """
+            collection_entry entry
+            join item on entry.item = item.rowid
+        """
+        conditions.append("entry.collection = ?")
+        params.append(collection_id)
+    else:
+        source = "item"
+
+    words = casefolded_query.split() if casefolded_query else []
+    if not use_search_index:
+        for word in words:
+            conditions.append(
+                "item_search_text(item.field_data, item.creators)"
+                " like ? escape '\\'"
+            )
+            params.append(f"%{_escape_like_pattern(word)}%")
+    elif words:
+        index_conditions = []
+        index_params = []
+        phrases = []
+        for word in words:
+            if len(word) >= 3:
+                phrases.append('"{}"'.format(word.replace('"', '""')))
+            else:
+                # The trigram index can only scan for shorter strings
+                index_conditions.append("text like ? escape '\\'")
+                index_params.append(f"%{_escape_like_pattern(word)}%")
+        if phrases:
+            index_conditions.append("item_fts match ?")
+            index_params.append(" ".join(phrases))
+        conditions.append(f"""
+            item.rowid in (
+                select rowid
+                from item_fts
+                where {" and ".join(index_conditions)}
+            )
+        """)
+        params.extend(index_params)
+
+    where_clause = f"where {' and '.join(conditions)}" if conditions else ""
+    return f"""
+        select item.rowid
+        from {source}
+        {where_clause}
+    """, params
+
+
+def _escape_like_pattern(value: str, /) -> str:
+    return (
+        value
+        .replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+
+
 class ItemCollectionScreen(ModalScreen):
     def __init__(self, db_connection: sqlite3.Connection, item_rowid: int):
         super().__init__(classes="modal-screen")
@@ -220,29 +464,28 @@ class ItemCollectionScreen(ModalScreen):
         with Widget(classes="modal-dialog"):
             yield Label("Manage collections of item", classes="question")
             with VerticalScroll(classes="checkboxes"):
-                cur = self.db_connection.cursor()
-                collections = cur.execute("""
-                    select rowid, name from collection
-                """).fetchall()
-
-                active_collection_rowids = cur.execute(
+                active_collection_rowids = fetch_set(
+                    self.db_connection,
                     """
-                        select c.rowid
-                        from collection_entry e
-                        join collection c on e.collection = c.rowid
-                        where e.item = ?
+                        select collection
+                        from collection_entry
+                        where item = ?
                     """,
                     (self.item_rowid,)
-                ).fetchall()
+                )
+                self.active_collection_rowids = active_collection_rowids
+                # The names may still be loading, or have been added to since
+                collection_names = dict(self.app.collection_names)
+                self.shown_collection_rowids = set(collection_names)
 
                 yield SelectionList(
                     *[
                         (
                             col_name,
                             col_rowid,
-                            (col_rowid,) in active_collection_rowids
+                            col_rowid in active_collection_rowids
                         )
-                        for col_rowid, col_name in collections
+                        for col_rowid, col_name in collection_names.items()
                     ]
                 )
             with Widget(classes="modal-buttons"):
@@ -256,24 +499,32 @@ class ItemCollectionScreen(ModalScreen):
         if event.button.id == "cancel":
             self.dismiss()
         elif event.button.id == "ok":
-            cur = self.db_connection.cursor()
-            cur.execute(
-                """
-                    delete from collection_entry
-                    where item = ?
-                """,
-                (self.item_rowid,)
-            )
-            for col_rowid in self.query_one(SelectionList).selected:
-                cur.execute(
-                    """
-                        insert into collection_entry (collection, item)
-                        values (?, ?)
-                    """,
-                    (col_rowid, self.item_rowid)
-                )
-            self.db_connection.commit()
-            cur.close()
+            selected = set(self.query_one(SelectionList).selected)
+            # Collections that weren't listed couldn't have been deselected
+            removed = (
+                self.active_collection_rowids
+                & self.shown_collection_rowids
+            ) - selected
+            added = selected - self.active_collection_rowids
+            # Only the entries that changed are written
+            with self.db_connection:
+                if removed:
+                    self.db_connection.execute(
+                        f"""
+                            delete from collection_entry
+                            where item = ?
+                            and collection in ({", ".join("?" * len(removed))})
+                        """,
+                        (self.item_rowid, *removed)
+                    )
+                if added:
+                    self.db_connection.executemany(
+                        """
+                            insert into collection_entry (collection, item)
+                            values (?, ?)
+                        """,
+                        [(col_rowid, self.item_rowid) for col_rowid in added]
+                    )
 
             self.dismiss()
 
@@ -285,12 +536,11 @@ class ItemTypeSelectionScreen(ModalScreen[str | None]):
     selected_type: reactive[str | None] = reactive(None)
 
     @on(OptionList.OptionHighlighted)
-    def highlighted(self, event: OptionList.OptionHighlighted) -> None:
-        event.stop()
-        self.selected_type = event.option.id
-
     @on(OptionList.OptionSelected)
-    def selected(self, event: OptionList.OptionSelected) -> None:
+    def option_changed(
+            self,
+            event: OptionList.OptionHighlighted | OptionList.OptionSelected
+    ) -> None:
         event.stop()
         self.selected_type = event.option.id
 
@@ -298,13 +548,7 @@ class ItemTypeSelectionScreen(ModalScreen[str | None]):
         with Widget(classes="modal-dialog"):
             yield Label("Select the type of item to create", classes="question")
             with VerticalScroll(classes="checkboxes"):
-                yield OptionList(
-                    *[
-                        Option(prompt=human_name, id=codename)
-                        for codename, human_name
-                        in ITEM_TYPE_NAMES.items()
-                    ]
-                )
+                yield OptionList(*_ITEM_TYPE_OPTIONS)
             with Widget(classes="modal-buttons"):
                 yield Button("OK", variant="primary", id="ok")
                 yield Button("Cancel", id="cancel")
@@ -0,0 +1,236 @@
+import argparse
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from textual.widgets import DataTable
+
+from pymetheus.db import create_library_at, run_in_db_thread, \
+    update_search_index
+from pymetheus.ui.app import PymetheusApp
+from pymetheus.ui.widgets.items_panel import ITEMS_PAGE_SIZE, ItemsPanel
+
+ITEM_COUNT_PER_WORD = 1000
+
+
+class ItemsPanelPagingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = Path(self.directory.name) / "library.sqlite"
+        connection = create_library_at(path)
+        with connection:
+            connection.executemany(
+                """
+                    insert into item (type, field_data, creators)
+                    values ('book', ?, '{}')
+                """,
+                [
+                    (json.dumps({"title": f"{word} {number}"}),)
+                    for word in ("alpha", "beta")
+                    for number in range(ITEM_COUNT_PER_WORD)
+                ]
+            )
+            update_search_index(connection)
+            self.collection_rowid, = connection.execute(
+                "insert into collection (name) values ('Betas') returning rowid"
+            ).fetchone()
+            connection.execute(
+                """
+                    insert into collection_entry (collection, item)
+                    select ?, rowid
+                    from item
+                    where json_extract(field_data, '$.title') like 'beta _'
+                """,
+                (self.collection_rowid,)
+            )
+        connection.close()
+
+        patcher = mock.patch(
+            "pymetheus.ui.app.get_parsed_args",
+            return_value=argparse.Namespace(library=path),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.app = PymetheusApp()
+        self.addCleanup(self.close_app_connections)
+
+    def close_app_connections(self):
+        self.app.db_connection.close()
+        self.app.db_read_connection.close()
+        self.directory.cleanup()
+
+    def get_titles(self) -> list[str]:
+        dt = self.app.query_one("#items-dt", DataTable)
+        return [dt.get_row_at(index)[1] for index in range(dt.row_count)]
+
+    async def wait_until(self, pilot, condition) -> None:
+        for _ in range(100):
+            await pilot.pause(0.05)
+            if condition():
+                return
+        self.fail("Timed out waiting for the items table")
+
+    async def start_app(self, pilot) -> tuple[ItemsPanel, DataTable]:
+        dt = self.app.query_one("#items-dt", DataTable)
+        await self.wait_until(pilot, lambda: dt.row_count)
+        return self.app.query_one(ItemsPanel), dt
+
+    async def test_loads_the_first_page(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+            await pilot.pause(0.2)
+            self.assertEqual(dt.row_count, ITEMS_PAGE_SIZE)
+            self.assertEqual(
+                len(items._unloaded_rowids),
+                2 * ITEM_COUNT_PER_WORD - ITEMS_PAGE_SIZE,
+            )
+            self.assertEqual(dt.cursor_row, 0)
+
+    async def test_loads_more_pages_near_the_end(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+            dt.move_cursor(row=dt.row_count - 1)
+            await self.wait_until(pilot, lambda: dt.row_count > ITEMS_PAGE_SIZE)
+
+            row_count = dt.row_count
+            dt.scroll_end(animate=False)
+            await self.wait_until(pilot, lambda: dt.row_count > row_count)
+            self.assertEqual(dt.row_count % ITEMS_PAGE_SIZE, 0)
+            self.assertEqual(
+                self.get_titles(),
+                [f"alpha {number}" for number in range(dt.row_count)]
+            )
+
+    async def test_loads_every_page_in_order(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+            dt.focus()
+            while items._unloaded_rowids:
+                await pilot.press("end")
+                await pilot.pause(0.05)
+            await pilot.pause(0.2)
+            self.assertEqual(
+                self.get_titles(),
+                [
+                    f"{word} {number}"
+                    for word in ("alpha", "beta")
+                    for number in range(ITEM_COUNT_PER_WORD)
+                ]
+            )
+
+    async def test_loads_a_page_once_while_it_is_loading(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+
+            blocker = threading.Event()
+            blocked = asyncio.ensure_future(run_in_db_thread(blocker.wait))
+            try:
+                # pilot.pause would wait for the handler that is loading
+                dt.move_cursor(row=dt.row_count - 1)
+                await asyncio.sleep(0.1)
+                self.assertEqual(items._loading_rows_for, items._refresh_count)
+                unloaded_count = len(items._unloaded_rowids)
+                await asyncio.wait_for(items.load_more_rows(), 1)
+                self.assertEqual(len(items._unloaded_rowids), unloaded_count)
+            finally:
+                blocker.set()
+            await blocked
+
+            await self.wait_until(
+                pilot, lambda: items._loading_rows_for is None
+            )
+            self.assertEqual(
+                self.get_titles(),
+                [f"alpha {number}" for number in range(dt.row_count)]
+            )
+
+    async def test_searches_only_list_matching_items(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+            items.search_string = "BETA 99"
+            await self.wait_until(pilot, lambda: dt.row_count == 11)
+            self.assertEqual(
+                self.get_titles(),
+                ["beta 99", *(f"beta {number}" for number in range(990, 1000))]
+            )
+            self.assertEqual(items._unloaded_rowids, [])
+
+    async def test_drops_a_page_load_that_a_refresh_replaced(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+
+            # The page load waits behind this, and the refresh behind both
+            blocker = threading.Event()
+            blocked = asyncio.ensure_future(run_in_db_thread(blocker.wait))
+            try:
+                dt.move_cursor(row=dt.row_count - 1)
+                await asyncio.sleep(0.1)
+                self.app.selected_collection_id = self.collection_rowid
+                await asyncio.sleep(0.1)
+            finally:
+                blocker.set()
+            await blocked
+
+            await self.wait_until(pilot, lambda: dt.row_count == 10)
+            await pilot.pause(0.2)
+            self.assertEqual(
+                self.get_titles(),
+                [f"beta {number}" for number in range(10)]
+            )
+
+    async def test_shows_the_results_of_the_newest_refresh(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+
+            blocker = threading.Event()
+            blocked = asyncio.ensure_future(run_in_db_thread(blocker.wait))
+            try:
+                items.search_string = "alpha 99"
+                await asyncio.sleep(0.4)
+                items.search_string = "beta 99"
+                await asyncio.sleep(0.4)
+            finally:
+                blocker.set()
+            await blocked
+
+            await self.wait_until(
+                pilot, lambda: dt.row_count and dt.get_row_at(0)[1] != "alpha 0"
+            )
+            await pilot.pause(0.2)
+            self.assertEqual(
+                self.get_titles(),
+                ["beta 99", *(f"beta {number}" for number in range(990, 1000))]
+            )
+
+    async def test_refresh_discards_pages_of_the_previous_results(self):
+        async with self.app.run_test() as pilot:
+            items, dt = await self.start_app(pilot)
+
+            # Holds the refresh's query back while the cursor reaches the end
+            blocker = threading.Event()
+            blocked = asyncio.ensure_future(run_in_db_thread(blocker.wait))
+            try:
+                items.search_string = "beta"
+                await asyncio.sleep(0.4)
+                dt.move_cursor(row=dt.row_count - 1)
+                await asyncio.sleep(0.1)
+            finally:
+                blocker.set()
+            await blocked
+
+            await self.wait_until(
+                pilot, lambda: dt.row_count and dt.get_row_at(0)[1] != "alpha 0"
+            )
+            await pilot.pause(0.2)
+            titles = self.get_titles()
+            self.assertTrue(titles)
+            self.assertTrue(all(title.startswith("beta ") for title in titles))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from pymetheus.paths import get_default_lib_filename, \
+    search_library_file_with_precedence
+
+
+class SearchLibraryFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.root = Path(os.path.realpath(self.directory.name))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_dirs(self, *names: str) -> list[Path]:
+        paths = [self.root / name for name in names]
+        for path in paths:
+            path.mkdir(parents=True, exist_ok=True)
+        return paths
+
+    def make_library(self, directory: str) -> Path:
+        path, = self.make_dirs(directory)
+        library_path = path / get_default_lib_filename()
+        library_path.touch()
+        return library_path
+
+    def search(self, *names: str) -> Path | None:
+        return search_library_file_with_precedence(
+            [self.root / name for name in names]
+        )
+
+    def test_prefers_earlier_paths(self):
+        self.make_dirs("empty")
+        first = self.make_library("first")
+        second = self.make_library("second")
+        self.assertEqual(self.search("first", "second"), first)
+        self.assertEqual(self.search("second", "first"), second)
+        self.assertEqual(self.search("empty", "second"), second)
+
+    def test_finds_library_files_given_directly(self):
+        self.make_library("first")
+        other = self.root / "other.sqlite"
+        other.touch()
+        self.assertEqual(self.search("other.sqlite", "first"), other)
+
+    def test_searches_every_path_before_ancestors(self):
+        self.make_library("parent")
+        self.make_dirs("parent/child")
+        second = self.make_library("second")
+        self.assertEqual(self.search("parent/child", "second"), second)
+
+    def test_searches_nearest_ancestors_first(self):
+        self.make_library("a")
+        nearer = self.make_library("a/b")
+        self.make_dirs("a/b/c/d")
+        self.assertEqual(self.search("a/b/c/d"), nearer)
+
+    def test_searches_ancestors_of_earlier_paths_first(self):
+        self.make_dirs("shared/x/y", "shared/z/w")
+        x_library = self.make_library("shared/x")
+        z_library = self.make_library("shared/z")
+        self.make_library("shared")
+        self.assertEqual(self.search("shared/x/y", "shared/z/w"), x_library)
+        self.assertEqual(self.search("shared/z/w", "shared/x/y"), z_library)
+
+    def test_resolves_symlinks_before_parent_directories(self):
+        target = self.make_library("real")
+        self.make_dirs("real/sub")
+        (self.root / "link").symlink_to(self.root / "real/sub")
+        self.assertEqual(self.search("link/.."), target)
+
+    def test_returns_resolved_library_paths(self):
+        target = self.make_library("real")
+        (self.root / "link").symlink_to(self.root / "real")
+        self.assertEqual(self.search("link"), target)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import json
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from pymetheus.db import create_library_at, open_library_at, \
+    update_search_index
+from pymetheus.models_pymetheus import Item
+from pymetheus.ui.widgets.items_panel import _get_item_rowids_query
+
+ITEMS = [
+    (
+        "book",
+        {"title": "Die Straße"},
+        {"author": [{"family": "Gauß", "given": "Carl Friedrich"}]},
+    ),
+    ("book", {"title": "Eﬃcient ﬁle systems"}, {}),
+    ("book", {"title": "Absolute zero is 0 K"}, {}),
+    ("book", {"title": "Unrelated"}, {"editor": [{"literal": "Someone"}]}),
+    ("book", {"title": "Percent 100% under_score"}, {}),
+]
+
+# Stored the way older versions wrote JSON, with non-ASCII escaped
+ESCAPED_ITEM = (
+    "book",
+    {"title": "Gauß, escaped"},
+    {},
+)
+
+
+class SearchPrefilterTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "library.sqlite"
+        self.connection = create_library_at(self.path)
+        self.items: dict[int, Item] = {}
+        for item_type, field_data, creators in ITEMS:
+            self.add_item(
+                item_type,
+                json.dumps(field_data, ensure_ascii=False),
+                json.dumps(creators, ensure_ascii=False),
+            )
+        item_type, field_data, creators = ESCAPED_ITEM
+        self.add_item(item_type, json.dumps(field_data), json.dumps(creators))
+        self.connection.commit()
+
+    def tearDown(self):
+        self.connection.close()
+        self.directory.cleanup()
+
+    def add_item(self, item_type: str, field_data: str, creators: str):
+        rowid, = self.connection.execute(
+            """
+                insert into item (type, field_data, creators)
+                values (?, ?, ?)
+                returning rowid
+            """,
+            (item_type, field_data, creators)
+        ).fetchone()
+        update_search_index(self.connection)
+        self.items[rowid] = Item.from_triplet(
+            item_type=item_type,
+            field_data=json.loads(field_data),
+            creators=json.loads(creators),
+        )
+
+    def get_candidates(
+            self,
+            query: str,
+            use_search_index: bool = True
+    ) -> set[int]:
+        sql, params = _get_item_rowids_query(
+            None, query.casefold(), use_search_index
+        )
+        return {rowid for rowid, in self.connection.execute(sql, params)}
+
+    def get_matches(self, query: str) -> set[int]:
+        casefolded_query = query.casefold()
+        return {
+            rowid
+            for rowid, item in self.items.items()
+            if item.search(casefolded_query, casefolded=True)
+        }
+
+    def assert_keeps_matches(
+            self,
+            queries: list[str],
+            use_search_index: bool = True
+    ):
+        for query in queries:
+            with self.subTest(query=query):
+                matches = self.get_matches(query)
+                self.assertTrue(matches)
+                self.assertLessEqual(
+                    matches, self.get_candidates(query, use_search_index)
+                )
+
+    def test_keeps_matches_that_casefold_to_ascii(self):
+        self.assert_keeps_matches([
+            "Straße", "straße", "strasse", "STRASSE", "ss", "ſtraße",
+            "Gauß", "gauss", "carl", "Carl Friedrich Gauss",
+            "efficient", "file", "ﬁle", "0 k", "K", "k",
+        ])
+
+    def test_keeps_matches_stored_with_escaped_json(self):
+        self.assert_keeps_matches(["gauß, escaped", "gauss", "ß"])
+
+    def test_keeps_matches_with_like_wildcards(self):
+        self.assert_keeps_matches(["100%", "%", "under_score", "_"])
+
+    def test_drops_items_without_the_query(self):
+        self.assertEqual(self.get_candidates("zzz"), set())
+        self.assertEqual(
+            self.get_candidates("Unrelated"),
+            self.get_matches("Unrelated"),
+        )
+
+    def test_scans_items_without_the_index(self):
+        self.assert_keeps_matches(
+            ["strasse", "Carl Friedrich Gauss", "ﬁle", "k", "100%", "_"],
+            use_search_index=False,
+        )
+        self.assertEqual(self.get_candidates("zzz", False), set())
+
+    def test_opens_libraries_where_the_index_is_unsupported(self):
+        self.connection.close()
+        with mock.patch(
+                "pymetheus.db.supports_search_index", return_value=False
+        ):
+            self.connection = open_library_at(self.path)
+            self.add_item("book", '{"title": "Added later"}', "{}")
+            self.connection.commit()
+            self.connection.close()
+
+        self.connection = open_library_at(self.path)
+        self.assert_keeps_matches(["added later", "strasse"])
+
+    def test_indexes_items_written_by_other_clients(self):
+        self.connection.close()
+        # Without the functions pymetheus registers on its connections
+        self.connection = sqlite3.connect(self.path)
+        with self.connection:
+            rowid, = self.connection.execute(
+                """
+                    insert into item (type, field_data, creators)
+                    values ('book', '{"title": "Written elsewhere"}', '{}')
+                    returning rowid
+                """
+            ).fetchone()
+            self.connection.execute(
+                """
+                    update item
+                    set field_data = '{"title": "Renamed"}'
+                    where json_extract(field_data, '$.title') = 'Die Straße'
+                """
+            )
+            self.connection.execute(
+                "delete from item where field_data like '%Unrelated%'"
+            )
+        self.connection.close()
+        self.items[rowid] = Item.from_triplet(
+            item_type="book",
+            field_data={"title": "Written elsewhere"},
+            creators={},
+        )
+        for item in self.items.values():
+            if item.field_data.get("title") == "Die Straße":
+                item.field_data["title"] = "Renamed"
+
+        self.connection = open_library_at(self.path)
+        self.assert_keeps_matches(["written elsewhere", "renamed"])
+        self.assertEqual(self.get_candidates("straße"), set())
+        self.assertEqual(self.get_candidates("unrelated"), set())
+
+
+if __name__ == "__main__":
+    unittest.main()